@@ -1,3 +1,4 @@
 from b24api.api import Bitrix24
+from b24api.async_api import AsyncBitrix24
 
-__all__ = ["Bitrix24"]
+__all__ = ["AsyncBitrix24", "Bitrix24"]
@@ -1,80 +1,100 @@
 import contextlib
-import json
-import logging
-from collections.abc import Generator, Iterable
+import math
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
 from itertools import chain, islice
-from operator import itemgetter
+from typing import TypeVar
 
-import h2.exceptions
 import httpx
 from fast_depends import inject
-from pydantic import ValidationError
-from retry import retry
 
-from b24api.entity import ApiTypes, BatchResult, ErrorResponse, ListRequest, Request, Response
-from b24api.error import RetryApiResponseError, RetryHTTPStatusError
+from b24api.base import RETRY_EXCEPTIONS, BaseBitrix24
+from b24api.compat import batched
+from b24api.entity import ApiTypes, ListRequest, Request, Response
 from b24api.settings import ApiSettings
 from b24api.transport import HttpxClient
 
+T = TypeVar("T")
 
-class Bitrix24:
+
+class Bitrix24(BaseBitrix24):
     @inject
     def __init__(self, client: HttpxClient, settings: ApiSettings) -> None:
+        super().__init__(settings)
         self.client = client
-        self.settings = settings
-        self.logger = logging.getLogger("b24api")
-
-        retry_ = partial(
-            retry,
-            exceptions=(
-                httpx.TransportError,
-                h2.exceptions.ProtocolError,
-                RetryHTTPStatusError,
-                RetryApiResponseError,
-            ),
-            tries=self.settings.retry_tries,
-            delay=self.settings.retry_delay,
-            backoff=self.settings.retry_backoff,
-            logger=self.logger,
-        )
-        self._call_retry = retry_()(self._call)
-        self._batch_retry = retry_()(self._batch)
 
-    def call(self, request: Request | dict) -> ApiTypes:
-        """Call any method (with retries) and return just `result`."""
-        return self._call_retry(request).result
+        if self.settings.preconnect:
+            threading.Thread(target=self._preconnect, daemon=True).start()
 
-    def _call(self, request: Request | dict) -> Response:
-        """Call any method and return full response."""
-        request = Request.model_validate(request)
+    def _preconnect(self) -> None:
+        """Open connection (TCP, TLS and HTTP/2 handshakes) before the first call."""
+        with contextlib.suppress(httpx.HTTPError):
+            self.client.head(self.webhook_url, timeout=5)
 
-        self.logger.debug("Sending request: %s", request)
+    def _retry(self, func: Callable[..., T], *args: object) -> T:
+        """Call `func` with retries."""
+        delay = 0.0
+        for _ in range(self.settings.retry_tries - 1):
+            try:
+                return func(*args)
+            except RETRY_EXCEPTIONS as error:  # noqa: PERF203
+                delay = self._retry_wait(delay, error)
+                self.logger.warning("%s, retrying in %.2f seconds...", error, delay)
+                time.sleep(delay)
 
-        http_response = self.client.post(
-            f"{self.settings.webhook_url}{request.method}",
-            headers={"Content-Type": "application/json"},
-            json=request.model_dump(mode="json")["parameters"],
-        )
+        return func(*args)
 
-        with contextlib.suppress(httpx.ResponseNotRead, json.JSONDecodeError, ValidationError):
-            ErrorResponse.model_validate(http_response.json()).raise_error(self.settings.retry_errors)
+    @staticmethod
+    def _prefetch(calls: Iterable[Callable[[], T]]) -> Generator[T, None, None]:
+        """Run calls in background thread one ahead of consumer.
 
+        Next call (e.g. HTTP round trip) overlaps with processing of previous result.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
         try:
-            json_response = http_response.raise_for_status().json()
-        except httpx.HTTPStatusError as error:
-            if http_response.status_code in self.settings.retry_statuses:
-                raise RetryHTTPStatusError(
-                    str(error),
-                    request=error.request,
-                    response=error.response,
-                ) from error
-            raise
+            future: Future[T] | None = None
+            for call in calls:
+                next_future = executor.submit(call)
+                if future is not None:
+                    yield future.result()
+                future = next_future
+
+            if future is not None:
+                yield future.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def call(self, request: Request | dict, *, cache: bool = False) -> ApiTypes:
+        """Call any method (with retries) and return just `result`.
+
+        With `cache` (only for read methods) result is taken from cache if `cache_size` is set and same request
+        was made recently.
+        """
+        key = self._encode(request)
+        if not cache or self.cache is None:
+            return self._retry(self._post, *key).result
+
+        hit, result = self.cache.get(key)
+        if not hit:
+            result = self._retry(self._post, *key).result
+            self.cache.put(key, result)
+
+        return result
 
-        with contextlib.suppress(ValidationError):
-            ErrorResponse.model_validate(json_response).raise_error(self.settings.retry_errors)
+    def _post(self, method: str, content: bytes) -> Response:
+        """Send serialized request and return full response."""
+        self.logger.debug("Sending request: %s %s", method, content)
 
-        response = Response.model_validate(json_response)
+        if self.breaker:
+            self.breaker.check()
+        if self.bucket:
+            self.bucket.acquire()
+
+        http_response = self.client.post(self._method_url(method), content=content)
+        response = self._parse_response(http_response)
 
         self.logger.debug("Received response: %s", response)
 
@@ -88,52 +108,29 @@ class Bitrix24:
         """Call infinite sequence of methods within batches and return just `result`s."""
         batch_size = batch_size or self.settings.batch_size
 
-        tail_requests = iter(requests)
-        while batched_requests := list(islice(tail_requests, batch_size)):
-            for response in self._batch_retry(batched_requests):
+        for batched_requests in batched(requests, batch_size):
+            for response in self._retry(self._batch, *self._batch_request(batched_requests)):
                 yield response.result
 
-    def _batch(self, requests: Iterable[Request | dict]) -> list[Response]:
-        """Call batch of methods and return full responses."""
-        commands = {f"_{i}": Request.model_validate(request) for i, request in enumerate(requests)}
-        request = Request(
-            method="batch",
-            parameters={
-                "halt": True,
-                "cmd": {key: request.query for key, request in commands.items()},
-            },
-        )
-
-        result = self._call(request).result
-        result = BatchResult.model_validate(result)
+    def _prefetch_batch(self, requests: Iterable[Request], batch_size: int) -> Generator[ApiTypes, None, None]:
+        """Same as `batch`, but next batch is requested while results of previous one are consumed.
 
-        responses = []
-        for i in range(len(commands)):
-            key = f"_{i}"
+        For read-only (`list`) requests only: next batch is sent before previous one is checked for errors.
+        """
 
-            if key in result.result_error:
-                ErrorResponse.model_validate(result.result_error[key]).raise_error(self.settings.retry_errors)
+        def _batch_calls() -> Generator[Callable[[], list[Response]], None, None]:
+            for batched_requests in batched(requests, batch_size):
+                yield partial(self._retry, self._batch, *self._batch_request(batched_requests))
 
-            command = commands[key]
-            if key not in result.result:
-                raise ValueError(
-                    f"Expecting `result` to contain result for command {{`{key}`: {command}}}. Got: {result}",
-                )
-            if key not in result.result_time:
-                raise ValueError(
-                    f"Expecting `result_time` to contain result for command {{`{key}`: {command}}}. Got: {result}",
-                )
+        for responses in self._prefetch(_batch_calls()):
+            for response in responses:
+                yield response.result
 
-            responses.append(
-                Response(
-                    result=result.result[key],
-                    time=result.result_time[key],
-                    total=result.result_total.get(key, None),
-                    next=result.result_next.get(key, None),
-                ),
-            )
+    def _batch(self, commands: list[Request], method: str, content: bytes) -> list[Response]:
+        """Call prepared batch of methods and return full responses."""
+        result = self._post(method, content).result
 
-        return responses
+        return self._batch_responses(commands, result)
 
     def list_sequential(
         self,
@@ -143,25 +140,24 @@ class Bitrix24:
         """Call `list` method and return full `result`.
 
         Slow (sequential tail) list gathering for methods without `filter` parameter (e.g. `department.get`).
+        Next chunk is requested while previous one is consumed.
         """
         request = Request.model_validate(request)
         list_size = list_size or self.settings.list_size
 
-        head_request = request.model_copy(deep=True)
-        head_request.parameters["start"] = 0
+        head_request = self._page_request(request, 0)
 
-        head_response = self._call_retry(head_request)
+        head_response = self._retry(self._post, *self._encode(head_request))
         yield from self._fix_list_result(head_response.result)
 
         if head_response.next and head_response.next != list_size:
             raise ValueError(f"Expecting list chunk size to be {list_size}. Got: {head_response.next}")
 
-        total = head_response.total or 0
-        for start in range(list_size, total, list_size):
-            tail_request = head_request.model_copy(deep=True)
-            tail_request.parameters["start"] = start
-            tail_response = self._call_retry(tail_request)
-
+        starts = range(list_size, head_response.total or 0, list_size)
+        tail_calls = (
+            partial(self._retry, self._post, *self._encode(self._page_request(head_request, start))) for start in starts
+        )
+        for start, tail_response in zip(starts, self._prefetch(tail_calls), strict=True):
             if tail_response.next and tail_response.next != start + list_size:
                 raise ValueError(
                     f"Expecting next list chunk to start at {start + list_size}. Got: {tail_response.next}",
@@ -182,26 +178,22 @@ class Bitrix24:
         list_size = list_size or self.settings.list_size
         batch_size = batch_size or self.settings.batch_size
 
-        head_request = request.model_copy(deep=True)
-        head_request.parameters["start"] = 0
+        head_request = self._page_request(request, 0)
 
-        head_response = self._call_retry(head_request)
+        head_response = self._retry(self._post, *self._encode(head_request))
         yield from self._fix_list_result(head_response.result)
 
         if head_response.next and head_response.next != list_size:
             raise ValueError(f"Expecting chunk size to be {list_size}. Got: {head_response.next}")
 
         def _tail_requests() -> Generator[Request, None, None]:
+            page_query = self._page_query(head_request)
             total = head_response.total or 0
             for start in range(list_size, total, list_size):
-                tail_request = head_request.model_copy(deep=True)
-                tail_request.parameters["start"] = start
-                yield tail_request
+                yield self._page_request(head_request, start, page_query)
 
-        tail_responses = self.batch(_tail_requests(), batch_size)
-        tail_responses = map(self._fix_list_result, tail_responses)
-        tail_responses = chain.from_iterable(tail_responses)
-        yield from tail_responses
+        for tail_result in self._prefetch_batch(_tail_requests(), batch_size):
+            yield from self._fix_list_result(tail_result)
 
     def list_batched_no_count(
         self,
@@ -220,10 +212,9 @@ class Bitrix24:
 
         select_ = request.parameters.select
         if "*" not in select_ and id_key not in select_:
-            request.select.append(id_key)
+            request = self._update_list_request(request, select=[*select_, id_key])
 
         id_from, id_to = f">{id_key}", f"<{id_key}"
-        get_id = itemgetter(id_key)
 
         filter_ = request.parameters.filter
         if filter_ and (id_from in filter_ or id_to in filter_):
@@ -234,37 +225,79 @@ class Bitrix24:
         if request.parameters.order:
             raise ValueError("Ordering parameters are reserved `order`in `list_batched_no_count`")
 
-        head_request = request.model_copy(deep=True)
-        head_request.parameters.start = -1
-        head_request.parameters.order = {"ID": "ASC"}
+        head_request = self._update_list_request(request, start=-1, order={"ID": "ASC"})
+        tail_request = self._update_list_request(request, start=-1, order={"ID": "DESC"})
+
+        def _body_requests(starts: range, stop: float) -> Generator[ListRequest, None, None]:
+            for start in starts:
+                yield self._update_list_request(
+                    head_request,
+                    filter={**filter_, id_from: start, id_to: min(start + list_size + 1, stop)},
+                )
 
-        tail_request = request.model_copy(deep=True)
-        tail_request.parameters.start = -1
-        tail_request.parameters.order = {"ID": "DESC"}
+        def _speculative_requests(head_result: list) -> Generator[ListRequest, None, None]:
+            if len(head_result) == list_size:
+                max_head_id = max(int(item[id_key]) for item in head_result)
+                yield from _body_requests(range(max_head_id, max_head_id + list_size * batch_size, list_size), math.inf)
 
-        head_tail_result = self.batch([head_request, tail_request])
-        head_result, tail_result = tuple(map(self._fix_list_result, head_tail_result))
+        head_result, tail_result, speculative_results = self._list_head_tail(
+            head_request,
+            tail_request,
+            _speculative_requests,
+            batch_size,
+        )
         yield from head_result
 
-        max_head_id = max(map(int, map(get_id, head_result)), default=None)
-        min_tail_id = min(map(int, map(get_id, tail_result)), default=None)
+        max_head_id = max((int(item[id_key]) for item in head_result), default=None)
+        tail_ids = [int(item[id_key]) for item in tail_result]
+        min_tail_id = min(tail_ids, default=None)
+
+        # Speculative body may overlap tail
+        speculative_items = chain.from_iterable(speculative_results)
+        yield from (item for item in speculative_items if int(item[id_key]) < min_tail_id)
+
+        # Each speculative request covers `list_size` IDs after head
+        body_start = max_head_id and max_head_id + list_size * len(speculative_results)
+
+        if body_start and min_tail_id and body_start < min_tail_id:
+            body_starts = range(body_start, min_tail_id, list_size)
+            for body_result in self._prefetch_batch(_body_requests(body_starts, min_tail_id), batch_size):
+                yield from self._fix_list_result(body_result)
+
+        # Tail is ordered by descending ID: only its leading items may be not yielded yet
+        tail_size = next((i for i, item_id in enumerate(tail_ids) if item_id <= max_head_id), len(tail_ids))
+        yield from reversed(tail_result[:tail_size])
+
+    def _list_head_tail(
+        self,
+        head_request: ListRequest,
+        tail_request: ListRequest,
+        speculative_requests: Callable[[list], Iterable[ListRequest]],
+        batch_size: int,
+    ) -> tuple[list, list, list[list]]:
+        """Request head and tail of list, and body batch that may follow head if `speculative_prefetch` is set.
+
+        With speculation tail is requested in background and body batch right after head, without waiting for
+        tail bounds. Saves a round trip on long lists, but wastes one batch on short ones.
+        """
+        if not self.settings.speculative_prefetch:
+            head_tail_result = self.batch([head_request, tail_request])
+            head_result, tail_result = map(self._fix_list_result, head_tail_result)
+            return head_result, tail_result, []
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            tail_future = executor.submit(lambda: list(self.batch([tail_request])))
+
+            [head_result] = self.batch([head_request])
+            head_result = self._fix_list_result(head_result)
 
-        def _body_requests() -> Generator[ListRequest, None, None]:
-            for start in range(max_head_id, min_tail_id, list_size):
-                body_request = head_request.model_copy(deep=True)
-                body_request.parameters.filter[id_from] = start
-                body_request.parameters.filter[id_to] = min(start + list_size + 1, min_tail_id)
-                yield body_request
+            speculative_results = self._prefetch_batch(speculative_requests(head_result), batch_size)
+            speculative_results = list(map(self._fix_list_result, speculative_results))
 
-        if max_head_id and min_tail_id and max_head_id < min_tail_id:
-            body = self.batch(_body_requests(), batch_size)
-            body = map(self._fix_list_result, body)
-            body = chain.from_iterable(body)
-            yield from body
+            [tail_result] = tail_future.result()
+            tail_result = self._fix_list_result(tail_result)
 
-        for item in reversed(tail_result):
-            if int(get_id(item)) > max_head_id:
-                yield item
+        return head_result, tail_result, speculative_results
 
     def reference_batched_no_count(
         self,
@@ -285,10 +318,9 @@ class Bitrix24:
 
         select_ = request.parameters.select
         if "*" not in select_ and id_key not in select_:
-            request.select.append(id_key)
+            request = self._update_list_request(request, select=[*select_, id_key])
 
         id_from = f">{id_key}"
-        get_id = itemgetter(id_key)
 
         filter_ = request.parameters.filter
         if filter_ and id_from in filter_:
@@ -305,11 +337,7 @@ class Bitrix24:
                     raise ValueError(
                         f"Filter parameters `{id_from}` is reserved in `reference_batched_no_count`",
                     )
-                tail_request = request.model_copy(deep=True)
-                tail_request.parameters.filter |= update
-                tail_request.parameters.start = -1
-                tail_request.parameters.order = {"ID": "ASC"}
-                yield tail_request
+                yield self._update_list_request(request, filter={**filter_, **update}, start=-1, order={"ID": "ASC"})
 
         head_requests = []
         tail_requests = iter(_tail_requests())
@@ -320,40 +348,8 @@ class Bitrix24:
             head_requests = []
             for body_request, body_result in zip(body_requests, body_results, strict=True):
                 if len(body_result) == list_size:
-                    max_id = max(map(int, map(get_id, body_result)), default=None)
-                    head_request = body_request.model_copy(deep=True)
-                    head_request.parameters.filter[id_from] = max_id
-                    head_requests.append(head_request)
+                    max_id = max((int(item[id_key]) for item in body_result), default=None)
+                    head_filter = {**body_request.parameters.filter, id_from: max_id}
+                    head_requests.append(self._update_list_request(body_request, filter=head_filter))
 
                 yield from body_result
-
-    @staticmethod
-    def _fix_list_result(result: list | dict[str, list]) -> list:
-        """Fix `list` method result to `list of items` structure.
-
-        There are two kinds of what `list` method `result` may contain:
-        - a list of items (e.g. `department-get` and `disk.folder.getchildren`),
-        - a dictionary with single item that contains the desired list of items
-            (e.g. `tasks` in `tasks.task.list`).
-        """
-        if not isinstance(result, list | dict):
-            raise TypeError(f"Expecting `result` to be a `list` or a `dict`. Got: {result}")
-
-        if not result:
-            return []
-
-        if isinstance(result, list):
-            return result
-
-        if len(result) != 1:
-            raise TypeError(
-                f"If `result` is a `dict`, expecting single item. Got: {result}",
-            )
-
-        key = next(iter(result))
-        value = result[key]
-
-        if not isinstance(value, list):
-            raise TypeError(f"If `result` is a `dict`, expecting single `list` item. Got: {result}")
-
-        return value
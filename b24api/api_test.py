@@ -1,6 +1,8 @@
 import json
 import math
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 from urllib.parse import parse_qs
 
 import httpx
@@ -9,7 +11,11 @@ from pytest_httpx import HTTPXMock
 from pytest_mock import MockerFixture
 
 from b24api.api import Bitrix24
-from b24api.error import ApiResponseError, RetryApiResponseError, RetryHTTPStatusError
+from b24api.error import ApiResponseError, CircuitOpenError, RetryApiResponseError, RetryHTTPStatusError
+
+
+def test_client_shared() -> None:
+    assert Bitrix24().client is Bitrix24().client
 
 
 def test_call(httpx_mock: HTTPXMock) -> None:
@@ -58,6 +64,24 @@ def test_call_list(httpx_mock: HTTPXMock) -> None:
     assert response == result
 
 
+def test_call_custom_types(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/crm.lead.add",
+        match_json={"fields": {"OPPORTUNITY": "1.5", "UF_TAGS": ["a"]}},
+        json={
+            "result": 1,
+            "time": _DEFAULT_TIME,
+        },
+    )
+
+    api = Bitrix24()
+    response = api.call(
+        {"method": "crm.lead.add", "parameters": {"fields": {"OPPORTUNITY": Decimal("1.5"), "UF_TAGS": {"a"}}}},
+    )
+    assert response == 1
+
+
 def test_call_status_error(httpx_mock: HTTPXMock) -> None:
     httpx_mock.add_response(
         method="POST",
@@ -93,6 +117,137 @@ def test_call_retry_status_error(httpx_mock: HTTPXMock, mocker: MockerFixture) -
     assert sleep_mock.call_count == num_retries - 1
 
 
+def test_call_retry_after(httpx_mock: HTTPXMock, mocker: MockerFixture) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        status_code=httpx.codes.TOO_MANY_REQUESTS,
+        headers={"Retry-After": "120"},
+        content=b"",
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        json={
+            "result": _DEFAULT_PROFILE,
+            "time": _DEFAULT_TIME,
+        },
+    )
+    sleep_mock = mocker.patch("time.sleep")
+
+    api = Bitrix24()
+    response = api.call({"method": "profile"})
+    assert response == _DEFAULT_PROFILE
+
+    retry_after = 120
+    sleep_mock.assert_called_once_with(retry_after)
+
+
+def test_call_rate_limit(httpx_mock: HTTPXMock, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        status_code=httpx.codes.TOO_MANY_REQUESTS,
+        content=b"",
+        is_reusable=True,
+    )
+    mocker.patch("time.sleep")
+    monkeypatch.setenv("BITRIX24_API_RATE_LIMIT", "16")
+
+    api = Bitrix24()
+    assert api.bucket
+    with pytest.raises(RetryHTTPStatusError):
+        api.call({"method": "profile"})
+
+    # Every throttled attempt halves rate, including the last one
+    rate_limit = 16 / 2**5
+    assert api.bucket.rate == rate_limit
+
+
+def test_call_circuit_breaker(httpx_mock: HTTPXMock, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        status_code=httpx.codes.TOO_MANY_REQUESTS,
+        content=b"",
+        is_reusable=True,
+    )
+    sleep_mock = mocker.patch("time.sleep")
+    monkeypatch.setenv("BITRIX24_API_CIRCUIT_THRESHOLD", "2")
+
+    api = Bitrix24()
+    with pytest.raises(CircuitOpenError):
+        api.call({"method": "profile"})
+
+    circuit_threshold = 2
+    assert len(httpx_mock.get_requests()) == circuit_threshold
+    # No wait before failing fast
+    assert sleep_mock.call_count == circuit_threshold - 1
+
+
+def test_call_circuit_breaker_last_attempt(
+    httpx_mock: HTTPXMock,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        status_code=httpx.codes.TOO_MANY_REQUESTS,
+        content=b"",
+        is_reusable=True,
+    )
+    mocker.patch("time.sleep")
+    num_retries = 5
+    monkeypatch.setenv("BITRIX24_API_CIRCUIT_THRESHOLD", str(num_retries))
+
+    api = Bitrix24()
+    with pytest.raises(RetryHTTPStatusError):
+        api.call({"method": "profile"})
+    with pytest.raises(CircuitOpenError):
+        api.call({"method": "profile"})
+
+    assert len(httpx_mock.get_requests()) == num_retries
+
+
+def test_call_cache(httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        json={
+            "result": _DEFAULT_PROFILE,
+            "time": _DEFAULT_TIME,
+        },
+        is_reusable=True,
+    )
+    monkeypatch.setenv("BITRIX24_API_CACHE_SIZE", "1")
+
+    api = Bitrix24()
+    response = api.call({"method": "profile"}, cache=True)
+    response["NAME"] = "Changed"
+
+    assert api.call({"method": "profile"}, cache=True) == _DEFAULT_PROFILE
+    assert len(httpx_mock.get_requests()) == 1
+
+    # Not cached by default (e.g. for write methods)
+    assert api.call({"method": "profile"}) == _DEFAULT_PROFILE
+
+    num_requests = 2
+    assert len(httpx_mock.get_requests()) == num_requests
+
+
 def test_call_api_error(httpx_mock: HTTPXMock) -> None:
     httpx_mock.add_response(
         method="POST",
@@ -215,6 +370,14 @@ def test_batch(httpx_mock: HTTPXMock) -> None:
     assert list(response) == result
 
 
+def test_batch_too_large() -> None:
+    batch_size = 257
+
+    api = Bitrix24()
+    with pytest.raises(ValueError, match="at most 256 commands"):
+        list(api.batch([{"method": "profile"}] * batch_size, batch_size))
+
+
 def test_batch_api_error(httpx_mock: HTTPXMock) -> None:
     httpx_mock.add_response(
         method="POST",
@@ -253,6 +416,36 @@ def test_batch_api_error(httpx_mock: HTTPXMock) -> None:
         )
 
 
+def test_batch_lazy(httpx_mock: HTTPXMock, mocker: MockerFixture) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/batch",
+        match_json={"halt": True, "cmd": {"_0": "crm.lead.add?fields%5BTITLE%5D=1"}},
+        json={
+            "result": {
+                "result": {"_0": 1},
+                "result_error": [],
+                "result_total": [],
+                "result_next": [],
+                "result_time": {"_0": _DEFAULT_TIME},
+            },
+            "time": _DEFAULT_TIME,
+        },
+    )
+
+    prefetch_spy = mocker.spy(Bitrix24, "_prefetch")
+
+    api = Bitrix24()
+    requests = [{"method": "crm.lead.add", "parameters": {"fields": {"TITLE": i}}} for i in range(1, 3)]
+    response = api.batch(requests, batch_size=1)
+    assert next(response) == 1
+
+    # Next batch of writes is not sent ahead of consumer, so it is never sent if consumer stops
+    response.close()
+    assert len(httpx_mock.get_requests()) == 1
+    prefetch_spy.assert_not_called()
+
+
 def test_batch_retry_api_error(httpx_mock: HTTPXMock, mocker: MockerFixture) -> None:
     httpx_mock.add_response(
         method="POST",
@@ -373,11 +566,30 @@ def test_list_batched(httpx_mock: HTTPXMock, total_items: int, list_size: int, b
     assert list(response) == result
 
 
+@pytest.fixture(params=[False, True], ids=["sequential", "speculative"])
+def _speculative_prefetch(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("BITRIX24_API_SPECULATIVE_PREFETCH", str(request.param))
+
+
+@pytest.mark.usefixtures("_speculative_prefetch")
 @pytest.mark.parametrize(
-    ("total_items", "list_size", "batch_size"),
-    [(150, 50, 1), (155, 50, 1), (10, 50, 50), (5500, 50, 50)],
+    ("total_items", "list_size", "batch_size", "select"),
+    [
+        (150, 50, 1, ["ID", "STATUS_ID"]),
+        (155, 50, 1, ["ID", "STATUS_ID"]),
+        (10, 50, 50, ["ID", "STATUS_ID"]),
+        (10, 50, 50, ["STATUS_ID"]),
+        (120, 50, 50, ["ID", "STATUS_ID"]),
+        (5500, 50, 50, ["ID", "STATUS_ID"]),
+    ],
 )
-def test_list_batched_no_count(httpx_mock: HTTPXMock, total_items: int, list_size: int, batch_size: int) -> None:
+def test_list_batched_no_count(
+    httpx_mock: HTTPXMock,
+    total_items: int,
+    list_size: int,
+    batch_size: int,
+    select: list[str],
+) -> None:
     result = [{"ID": i, "STATUS_ID": "1"} for i in range(total_items)]
 
     def custom_response(request: httpx.Request) -> httpx.Response:
@@ -389,8 +601,8 @@ def test_list_batched_no_count(httpx_mock: HTTPXMock, total_items: int, list_siz
             assert method == "crm.lead.list"
 
             command = parse_qs(command)
-            assert command.pop("select[0]", None) == ["ID"]
-            assert command.pop("select[1]", None) == ["STATUS_ID"]
+            for i, field in enumerate(select if "ID" in select else [*select, "ID"]):
+                assert command.pop(f"select[{i}]", None) == [field]
             assert command.pop("filter[>DATE]", None) == ["2025-03-14T14:00:17+03:00"]
             assert command.pop("start", None) == ["-1"]
 
@@ -434,7 +646,7 @@ def test_list_batched_no_count(httpx_mock: HTTPXMock, total_items: int, list_siz
         {
             "method": "crm.lead.list",
             "parameters": {
-                "select": ["ID", "STATUS_ID"],
+                "select": select,
                 "filter": {
                     ">DATE": datetime(2025, 3, 14, 14, 0, 17, tzinfo=timezone(timedelta(hours=3))),
                 },
@@ -458,6 +670,11 @@ def test_reference_batched_no_count(httpx_mock: HTTPXMock, total_items: int, lis
     ]
     result = sorted(result, key=lambda r: r["ID"])
 
+    # Index comments by entity once, instead of scanning all of them for each command
+    entity_result = defaultdict(list)
+    for r in result:
+        entity_result[r["ENTITY_ID"]].append(r)
+
     def custom_response(request: httpx.Request) -> httpx.Response:
         assert request.url == "https://bitrix24.com/rest/0/test/batch"
 
@@ -486,7 +703,7 @@ def test_reference_batched_no_count(httpx_mock: HTTPXMock, total_items: int, lis
             entity_id = int(entity_id[0])
             from_id = int(from_id[0])
 
-            data = [r for r in result if r["ENTITY_ID"] == entity_id and r["ID"] > from_id]
+            data = [r for r in entity_result[entity_id] if r["ID"] > from_id]
             output[key] = data[:list_size]
 
         return httpx.Response(
@@ -0,0 +1,188 @@
+import asyncio
+import typing
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator, Iterable
+from contextlib import aclosing
+from typing import TypeVar
+
+from fast_depends import inject
+
+from b24api.base import RETRY_EXCEPTIONS, BaseBitrix24
+from b24api.compat import batched
+from b24api.entity import ApiTypes, Request, Response
+from b24api.settings import ApiSettings
+from b24api.transport import HttpxAsyncClient
+
+if typing.TYPE_CHECKING:
+    from typing_extensions import Self
+
+T = TypeVar("T")
+
+
+class AsyncBitrix24(BaseBitrix24):
+    @inject
+    def __init__(self, client: HttpxAsyncClient, settings: ApiSettings) -> None:
+        super().__init__(settings)
+        self.client = client
+        self._http2: bool | None = None
+
+    async def __aenter__(self) -> "Self":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close HTTP client and its connections."""
+        await self.client.aclose()
+
+    async def _retry(self, func: Callable[..., Awaitable[T]], *args: object) -> T:
+        """Await `func` with retries."""
+        delay = 0.0
+        for _ in range(self.settings.retry_tries - 1):
+            try:
+                return await func(*args)
+            except RETRY_EXCEPTIONS as error:  # noqa: PERF203
+                delay = self._retry_wait(delay, error)
+                self.logger.warning("%s, retrying in %.2f seconds...", error, delay)
+                await asyncio.sleep(delay)
+
+        return await func(*args)
+
+    async def call(self, request: Request | dict, *, cache: bool = False) -> ApiTypes:
+        """Call any method (with retries) and return just `result`.
+
+        With `cache` (only for read methods) result is taken from cache if `cache_size` is set and same request
+        was made recently.
+        """
+        key = self._encode(request)
+        if not cache or self.cache is None:
+            return (await self._retry(self._post, *key)).result
+
+        hit, result = self.cache.get(key)
+        if not hit:
+            result = (await self._retry(self._post, *key)).result
+            self.cache.put(key, result)
+
+        return result
+
+    async def _post(self, method: str, content: bytes) -> Response:
+        """Send serialized request and return full response."""
+        self.logger.debug("Sending request: %s %s", method, content)
+
+        if self.breaker:
+            self.breaker.check()
+        if self.bucket:
+            await self.bucket.aacquire()
+
+        http_response = await self.client.post(self._method_url(method), content=content)
+        self._http2 = http_response.http_version == "HTTP/2"
+        response = self._parse_response(http_response)
+
+        self.logger.debug("Received response: %s", response)
+
+        return response
+
+    async def batch(
+        self,
+        requests: Iterable[Request | dict],
+        batch_size: int | None = None,
+    ) -> AsyncGenerator[ApiTypes, None]:
+        """Call infinite sequence of methods within concurrent batches and return just `result`s.
+
+        At most `concurrency` batches are in flight, results are returned in order of requests.
+        """
+        batch_size = batch_size or self.settings.batch_size
+
+        calls = (
+            self._retry(self._batch, *self._batch_request(batched_requests))
+            for batched_requests in batched(requests, batch_size)
+        )
+        async with aclosing(self._window(calls)) as window:
+            async for responses in window:
+                for response in responses:
+                    yield response.result
+
+    async def _window(self, calls: Iterable[Awaitable[T]]) -> AsyncGenerator[T, None]:
+        """Await at most `concurrency` calls at once and return results in order of calls.
+
+        Calls in flight are cancelled if one of them fails or consumer stops (closes generator).
+        """
+        window: deque[asyncio.Task[T]] = deque()
+        try:
+            for call in calls:
+                window.append(asyncio.ensure_future(call))
+                if len(window) < self.settings.concurrency:
+                    continue
+
+                yield await window.popleft()
+
+            while window:
+                yield await window.popleft()
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def _batch(self, commands: list[Request], method: str, content: bytes) -> list[Response]:
+        """Call prepared batch of methods and return full responses."""
+        result = (await self._post(method, content)).result
+
+        return self._batch_responses(commands, result)
+
+    async def multiplex(self, requests: Iterable[Request | dict]) -> AsyncGenerator[ApiTypes, None]:
+        """Call sequence of methods as concurrent HTTP/2 streams and return just `result`s.
+
+        No `batch` envelope and no limit on commands count, at most `concurrency` streams are in flight.
+        Falls back to `batch` if server does not support HTTP/2.
+        """
+        requests = iter(requests)
+
+        if self._http2 is None:
+            head_request = next(requests, None)
+            if head_request is None:
+                return
+            head_response = await self._retry(self._post, *self._encode(head_request))
+            yield head_response.result
+
+        if not self._http2:
+            async for result in self.batch(requests):
+                yield result
+            return
+
+        calls = (self._retry(self._post, *self._encode(request)) for request in requests)
+        async with aclosing(self._window(calls)) as window:
+            async for response in window:
+                yield response.result
+
+    async def list_batched(
+        self,
+        request: Request | dict,
+        list_size: int | None = None,
+        batch_size: int | None = None,
+    ) -> AsyncGenerator[ApiTypes, None]:
+        """Call `list` method and return full `result`.
+
+        Concurrent (batched tail) list gathering for methods without `filter` parameter (e.g. `department.get`).
+        """
+        request = Request.model_validate(request)
+        list_size = list_size or self.settings.list_size
+        batch_size = batch_size or self.settings.batch_size
+
+        head_request = self._page_request(request, 0)
+
+        head_response = await self._retry(self._post, *self._encode(head_request))
+        for item in self._fix_list_result(head_response.result):
+            yield item
+
+        if head_response.next and head_response.next != list_size:
+            raise ValueError(f"Expecting chunk size to be {list_size}. Got: {head_response.next}")
+
+        def _tail_requests() -> Generator[Request, None, None]:
+            page_query = self._page_query(head_request)
+            total = head_response.total or 0
+            for start in range(list_size, total, list_size):
+                yield self._page_request(head_request, start, page_query)
+
+        async for tail_result in self.batch(_tail_requests(), batch_size):
+            for item in self._fix_list_result(tail_result):
+                yield item
@@ -0,0 +1,240 @@
+import asyncio
+import math
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+from pytest_mock import MockerFixture
+
+from b24api.api_test import _DEFAULT_PROFILE, _DEFAULT_TIME
+from b24api.async_api import AsyncBitrix24
+from b24api.error import ApiResponseError, RetryHTTPStatusError
+
+
+def test_call(httpx_mock: HTTPXMock) -> None:
+    result = _DEFAULT_PROFILE
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        json={
+            "result": result,
+            "time": _DEFAULT_TIME,
+        },
+    )
+
+    api = AsyncBitrix24()
+    response = asyncio.run(api.call({"method": "profile"}))
+    assert response == result
+
+
+def test_aclose() -> None:
+    async def _client() -> httpx.AsyncClient:
+        async with AsyncBitrix24() as api:
+            return api.client
+
+    assert asyncio.run(_client()).is_closed
+
+
+def test_call_retry_status_error(httpx_mock: HTTPXMock, mocker: MockerFixture) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/profile",
+        match_headers={"Content-Type": "application/json"},
+        match_json={},
+        status_code=httpx.codes.TOO_MANY_REQUESTS,
+        content=b"",
+        is_reusable=True,
+    )
+    sleep_mock = mocker.patch("asyncio.sleep")
+
+    api = AsyncBitrix24()
+    with pytest.raises(RetryHTTPStatusError):
+        asyncio.run(api.call({"method": "profile"}))
+
+    num_retries = 5
+    assert sleep_mock.call_count == num_retries - 1
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 8])
+def test_batch(httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch, concurrency: int) -> None:
+    monkeypatch.setenv("BITRIX24_API_CONCURRENCY", str(concurrency))
+    for i in range(3):
+        httpx_mock.add_response(
+            method="POST",
+            url="https://bitrix24.com/rest/0/test/batch",
+            match_headers={"Content-Type": "application/json"},
+            match_json={
+                "halt": True,
+                "cmd": {"_0": f"department.get?ID={2 * i}", "_1": f"department.get?ID={2 * i + 1}"},
+            },
+            json={
+                "result": {
+                    "result": {"_0": [{"ID": str(2 * i)}], "_1": [{"ID": str(2 * i + 1)}]},
+                    "result_error": [],
+                    "result_total": [],
+                    "result_next": [],
+                    "result_time": {"_0": _DEFAULT_TIME, "_1": _DEFAULT_TIME},
+                },
+                "time": _DEFAULT_TIME,
+            },
+        )
+
+    async def _batch() -> list:
+        api = AsyncBitrix24()
+        requests = ({"method": "department.get", "parameters": {"ID": i}} for i in range(6))
+        return [result async for result in api.batch(requests, batch_size=2)]
+
+    response = asyncio.run(_batch())
+    assert response == [[{"ID": str(i)}] for i in range(6)]
+
+
+def test_multiplex(httpx_mock: HTTPXMock) -> None:
+    for i in range(60):
+        httpx_mock.add_response(
+            method="POST",
+            url="https://bitrix24.com/rest/0/test/department.get",
+            match_headers={"Content-Type": "application/json"},
+            match_json={"ID": i},
+            json={
+                "result": [{"ID": str(i)}],
+                "time": _DEFAULT_TIME,
+            },
+            http_version="HTTP/2",
+        )
+
+    async def _multiplex() -> list:
+        api = AsyncBitrix24()
+        requests = ({"method": "department.get", "parameters": {"ID": i}} for i in range(60))
+        return [result async for result in api.multiplex(requests)]
+
+    response = asyncio.run(_multiplex())
+    assert response == [[{"ID": str(i)}] for i in range(60)]
+
+
+def test_multiplex_error(httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    concurrency = 2
+    monkeypatch.setenv("BITRIX24_API_CONCURRENCY", str(concurrency))
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/user.update",
+        match_json={"ID": 0},
+        json={"result": True, "time": _DEFAULT_TIME},
+        http_version="HTTP/2",
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/user.update",
+        match_json={"ID": 1},
+        json={"error": "ACCESS_DENIED", "error_description": ""},
+        http_version="HTTP/2",
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/user.update",
+        json={"result": True, "time": _DEFAULT_TIME},
+        http_version="HTTP/2",
+        is_optional=True,
+        is_reusable=True,
+    )
+
+    async def _multiplex() -> list:
+        api = AsyncBitrix24()
+        requests = ({"method": "user.update", "parameters": {"ID": i}} for i in range(60))
+        return [result async for result in api.multiplex(requests)]
+
+    with pytest.raises(ApiResponseError):
+        asyncio.run(_multiplex())
+
+    # Head request and single window of streams, the rest are never sent
+    assert len(httpx_mock.get_requests()) <= 1 + concurrency
+
+
+def test_multiplex_http1(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/department.get",
+        match_headers={"Content-Type": "application/json"},
+        match_json={"ID": 0},
+        json={
+            "result": [{"ID": "0"}],
+            "time": _DEFAULT_TIME,
+        },
+        http_version="HTTP/1.1",
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/batch",
+        match_headers={"Content-Type": "application/json"},
+        match_json={"halt": True, "cmd": {"_0": "department.get?ID=1", "_1": "department.get?ID=2"}},
+        json={
+            "result": {
+                "result": {"_0": [{"ID": "1"}], "_1": [{"ID": "2"}]},
+                "result_error": [],
+                "result_total": [],
+                "result_next": [],
+                "result_time": {"_0": _DEFAULT_TIME, "_1": _DEFAULT_TIME},
+            },
+            "time": _DEFAULT_TIME,
+        },
+        http_version="HTTP/1.1",
+    )
+
+    async def _multiplex() -> list:
+        api = AsyncBitrix24()
+        requests = ({"method": "department.get", "parameters": {"ID": i}} for i in range(3))
+        return [result async for result in api.multiplex(requests)]
+
+    response = asyncio.run(_multiplex())
+    assert response == [[{"ID": str(i)}] for i in range(3)]
+
+
+@pytest.mark.parametrize(
+    ("total_items", "list_size", "batch_size"),
+    [(150, 50, 1), (10, 50, 50), (5500, 50, 50)],
+)
+def test_list_batched(httpx_mock: HTTPXMock, total_items: int, list_size: int, batch_size: int) -> None:
+    result = [{"ID": str(i), "STATUS_ID": "1"} for i in range(total_items)]
+    httpx_mock.add_response(
+        method="POST",
+        url="https://bitrix24.com/rest/0/test/crm.lead.list",
+        match_headers={"Content-Type": "application/json"},
+        match_json={"start": 0},
+        json={
+            "result": result[:list_size],
+            "total": total_items,
+            "time": _DEFAULT_TIME,
+        },
+    )
+    for batch_start in range(list_size, total_items, list_size * batch_size):
+        max_chunks = math.ceil((total_items - batch_start) / batch_size)
+        commands, results, times = {}, {}, {}
+        for chunk in range(min(batch_size, max_chunks)):
+            start = batch_start + chunk * list_size
+            commands[f"_{chunk}"] = f"crm.lead.list?start={start}"
+            results[f"_{chunk}"] = result[start : start + list_size]
+            times[f"_{chunk}"] = _DEFAULT_TIME
+        httpx_mock.add_response(
+            method="POST",
+            url="https://bitrix24.com/rest/0/test/batch",
+            match_headers={"Content-Type": "application/json"},
+            match_json={"halt": True, "cmd": commands},
+            json={
+                "result": {
+                    "result": results,
+                    "result_error": [],
+                    "result_total": [],
+                    "result_next": [],
+                    "result_time": times,
+                },
+                "time": _DEFAULT_TIME,
+            },
+        )
+
+    async def _list_batched() -> list:
+        api = AsyncBitrix24()
+        response = api.list_batched({"method": "crm.lead.list"}, list_size=list_size, batch_size=batch_size)
+        return [item async for item in response]
+
+    assert asyncio.run(_list_batched()) == result
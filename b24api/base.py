@@ -0,0 +1,296 @@
+import contextlib
+import logging
+import random
+import sys
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import NoReturn
+
+import h2.exceptions
+import httpx
+import orjson
+from pydantic import PrivateAttr, ValidationError
+from pydantic_core import to_jsonable_python
+
+from b24api.breaker import CircuitBreaker
+from b24api.cache import LRUCache
+from b24api.entity import BatchResult, ErrorResponse, ListRequest, Request, Response
+from b24api.error import RetryApiResponseError, RetryHTTPStatusError, raise_api_error
+from b24api.query import build_query
+from b24api.ratelimit import TokenBucket
+from b24api.settings import Settings
+from b24api.type import ApiTypes
+
+RETRY_EXCEPTIONS = (
+    httpx.TransportError,
+    h2.exceptions.ProtocolError,
+    RetryHTTPStatusError,
+    RetryApiResponseError,
+)
+
+# Datetimes are serialized natively by `orjson`, other values it does not support (e.g. `Decimal` or `set` nested
+# in parameters) are converted by `pydantic` as with `model_dump(mode="json")`
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+# Command keys `_0`, `_1`, ... of `batch` method (server accepts up to 50 commands)
+BATCH_KEYS = tuple(sys.intern(f"_{i}") for i in range(256))
+
+
+class BaseBitrix24:
+    """Transport-independent part of API client."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.logger = logging.getLogger("b24api")
+
+        # Method URLs are built by plain concatenation, without formatting `HttpUrl` for each call
+        self.webhook_url = str(settings.webhook_url)
+        # and parsed once per method, otherwise `httpx` parses URL string for each request
+        self.method_urls: dict[str, httpx.URL] = {}
+
+        self.bucket = None
+        if self.settings.rate_limit:
+            self.bucket = TokenBucket(
+                rate=self.settings.rate_limit,
+                capacity=self.settings.rate_limit_burst,
+                min_rate=self.settings.rate_limit_min,
+                max_rate=self.settings.rate_limit_max,
+                increase=self.settings.rate_limit_increase,
+            )
+
+        self.breaker = None
+        if self.settings.circuit_threshold:
+            self.breaker = CircuitBreaker(
+                threshold=self.settings.circuit_threshold,
+                cooldown=self.settings.circuit_cooldown,
+            )
+
+        self.cache = None
+        if self.settings.cache_size:
+            self.cache = LRUCache(size=self.settings.cache_size)
+
+    def _method_url(self, method: str) -> httpx.URL:
+        url = self.method_urls.get(method)
+        if url is None:
+            url = self.method_urls[method] = httpx.URL(self.webhook_url + method)
+
+        return url
+
+    def _parse_response(self, http_response: httpx.Response) -> Response:
+        """Check HTTP response for errors and parse it.
+
+        Body is decoded once: API errors come with both successful and error HTTP statuses.
+        """
+        json_response = None
+        with contextlib.suppress(httpx.ResponseNotRead, orjson.JSONDecodeError):
+            json_response = orjson.loads(http_response.content)
+
+        self._raise_error(json_response)
+
+        try:
+            http_response.raise_for_status()
+        except httpx.HTTPStatusError as error:
+            if http_response.status_code in self.settings.retry_statuses:
+                self._throttled()
+                raise RetryHTTPStatusError(
+                    str(error),
+                    request=error.request,
+                    response=error.response,
+                ) from error
+            raise
+
+        if json_response is None:
+            # Not decoded above, raise original error
+            json_response = orjson.loads(http_response.content)
+
+        if self.bucket:
+            self.bucket.on_success()
+        if self.breaker:
+            self.breaker.on_success()
+
+        return Response.model_validate(json_response)
+
+    def _raise_error(self, json_response: ApiTypes) -> None:
+        """Raise API error if response contains one.
+
+        Cheap key check first: successful responses are not probed with `ErrorResponse` validation.
+        """
+        if not isinstance(json_response, dict) or "error" not in json_response:
+            return
+
+        try:
+            error = ErrorResponse.model_validate(json_response)
+        except ValidationError:
+            return
+
+        self._raise_api_error(error.error, error.error_description)
+
+    def _raise_api_error(self, code: str | int, description: str | None) -> NoReturn:
+        """Raise API error, retryable ones are recorded as throttling."""
+        if code in self.settings.retry_errors:
+            self._throttled()
+
+        raise_api_error(code, description, self.settings.retry_errors)
+
+    def _throttled(self) -> None:
+        """Slow down rate limiter and trip circuit breaker on throttled call (every attempt, including the last one)."""
+        if self.bucket:
+            self.bucket.on_failure()
+        if self.breaker:
+            self.breaker.on_failure()
+
+    def _retry_wait(self, previous: float, error: Exception) -> float:
+        """Compute delay before next retry.
+
+        Exponential backoff with decorrelated jitter (delay grows from `previous` one),
+        but not less than server asks with `Retry-After` header.
+        Fails fast without waiting if circuit breaker is open.
+        """
+        if self.breaker:
+            self.breaker.check()
+
+        upper = max(previous, self.settings.retry_delay) * self.settings.retry_backoff
+        wait = min(random.uniform(self.settings.retry_delay, upper), self.settings.retry_max_delay)  # noqa: S311
+
+        if isinstance(error, httpx.HTTPStatusError):
+            wait = max(wait, _retry_after(error.response))
+
+        return wait
+
+    @staticmethod
+    def _encode(request: Request | dict) -> tuple[str, bytes]:
+        """Validate and serialize request once, so retries send ready body."""
+        request = Request.model_validate(request)
+        return request.method, orjson.dumps(
+            request.model_dump()["parameters"],
+            default=to_jsonable_python,
+            option=JSON_OPTIONS,
+        )
+
+    @staticmethod
+    def _batch_request(requests: Iterable[Request | dict]) -> tuple[list[Request], str, bytes]:
+        """Wrap methods into single serialized `batch` request."""
+        commands = [Request.model_validate(request) for request in requests]
+        if len(commands) > len(BATCH_KEYS):
+            raise ValueError(f"Expecting at most {len(BATCH_KEYS)} commands in batch. Got: {len(commands)}")
+        # Body of wrapper consists of plain strings, so it is dumped directly without `Request` model
+        cmd = {key: command.query for key, command in zip(BATCH_KEYS, commands, strict=False)}
+
+        return commands, "batch", orjson.dumps({"halt": True, "cmd": cmd})
+
+    def _batch_responses(self, commands: list[Request], result: ApiTypes) -> list[Response]:
+        """Split `batch` method result into full responses."""
+        result = BatchResult.model_validate(result)
+
+        results, times, errors = result.result, result.result_time, result.result_error
+        totals, nexts = result.result_total, result.result_next
+
+        responses = []
+        for key, command in zip(BATCH_KEYS, commands, strict=False):
+            if error := errors.get(key):
+                self._raise_api_error(error.error, error.error_description)
+
+            if key not in results:
+                raise ValueError(
+                    f"Expecting `result` to contain result for command {{`{key}`: {command}}}. Got: {result}",
+                )
+            if key not in times:
+                raise ValueError(
+                    f"Expecting `result_time` to contain result for command {{`{key}`: {command}}}. Got: {result}",
+                )
+
+            # Fields are already validated as part of `BatchResult`
+            responses.append(
+                Response.model_construct(
+                    result=results[key],
+                    time=times[key],
+                    total=totals.get(key),
+                    next=nexts.get(key),
+                ),
+            )
+
+        return responses
+
+    @staticmethod
+    def _page_query(request: Request) -> str:
+        """Query of `list` request without `start`, ready to append chunk offset."""
+        query = build_query({key: value for key, value in request.parameters.items() if key != "start"})
+        return f"{request.method}?{query}&" if query else f"{request.method}?"
+
+    @staticmethod
+    def _page_request(request: Request, start: int, page_query: str | None = None) -> Request:
+        """Shallow copy of `list` request for chunk starting at `start`.
+
+        Query is not rebuilt from parameters if `page_query` (see `_page_query`) is provided.
+        """
+        parameters = {**request.parameters, "start": start}
+        if page_query is None:
+            return Request.model_construct(method=request.method, parameters=parameters)
+
+        return _PageRequest.model_construct(method=request.method, parameters=parameters, _page_query=page_query)
+
+    @staticmethod
+    def _update_list_request(request: ListRequest, **parameters: ApiTypes) -> ListRequest:
+        """Shallow copy of `list` request with some parameters replaced."""
+        return request.model_copy(update={"parameters": request.parameters.model_copy(update=parameters)})
+
+    @staticmethod
+    def _fix_list_result(result: list | dict[str, list]) -> list:
+        """Fix `list` method result to `list of items` structure.
+
+        There are two kinds of what `list` method `result` may contain:
+        - a list of items (e.g. `department-get` and `disk.folder.getchildren`),
+        - a dictionary with single item that contains the desired list of items
+            (e.g. `tasks` in `tasks.task.list`).
+        """
+        # Decoded JSON contains exact `list` and `dict` types, no subclass checks needed
+        result_type = type(result)
+        if result_type is list:
+            return result
+
+        if result_type is not dict:
+            raise TypeError(f"Expecting `result` to be a `list` or a `dict`. Got: {result}")
+
+        if not result:
+            return []
+
+        if len(result) != 1:
+            raise TypeError(
+                f"If `result` is a `dict`, expecting single item. Got: {result}",
+            )
+
+        value = next(iter(result.values()))
+        if type(value) is not list:
+            raise TypeError(f"If `result` is a `dict`, expecting single `list` item. Got: {result}")
+
+        return value
+
+
+class _PageRequest(Request):
+    """Chunk of `list` request with query prefix prebuilt once for all chunks (see `BaseBitrix24._page_query`).
+
+    Internal to list helpers: only `start` may change, other parameters must match prefix.
+    """
+
+    _page_query: str = PrivateAttr()
+
+    @property
+    def query(self) -> str:
+        return f"{self._page_query}start={self.parameters['start']}"
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """Parse `Retry-After` header (seconds or HTTP date) into delay seconds."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0
+
+    with contextlib.suppress(ValueError):
+        return max(float(value), 0)
+
+    with contextlib.suppress(TypeError, ValueError):
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+    return 0
@@ -0,0 +1,40 @@
+import threading
+import time
+
+from b24api.error import CircuitOpenError
+
+
+class CircuitBreaker:
+    """Circuit breaker for throttling server.
+
+    After `threshold` consecutive throttled calls circuit opens and calls fail fast for `cooldown` seconds.
+    Then calls are let through again: first success closes circuit, next failure opens it for another cooldown.
+    """
+
+    def __init__(self, *, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self.failures = 0
+        self.opened = 0.0
+        self.lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise if circuit is open."""
+        with self.lock:
+            if self.failures < self.threshold:
+                return
+            wait = self.opened + self.cooldown - time.monotonic()
+
+        if wait > 0:
+            raise CircuitOpenError(f"Circuit is open for {wait:.2f} seconds more")
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+
+    def on_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened = time.monotonic()
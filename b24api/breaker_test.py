@@ -0,0 +1,39 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from b24api.breaker import CircuitBreaker
+from b24api.error import CircuitOpenError
+
+
+def test_open(mocker: MockerFixture) -> None:
+    mocker.patch("time.monotonic", return_value=100.0)
+
+    breaker = CircuitBreaker(threshold=2, cooldown=10)
+    breaker.on_failure()
+    breaker.check()
+
+    breaker.on_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_half_open(mocker: MockerFixture) -> None:
+    monotonic_mock = mocker.patch("time.monotonic", return_value=100.0)
+
+    breaker = CircuitBreaker(threshold=2, cooldown=10)
+    breaker.on_failure()
+    breaker.on_failure()
+
+    monotonic_mock.return_value = 111.0
+    breaker.check()
+
+    breaker.on_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    monotonic_mock.return_value = 122.0
+    breaker.check()
+
+    breaker.on_success()
+    breaker.on_failure()
+    breaker.check()
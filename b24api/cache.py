@@ -0,0 +1,37 @@
+import copy
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from b24api.type import ApiTypes
+
+
+class LRUCache:
+    """Least recently used cache of call results.
+
+    Results are copied on both put and get, so callers may mutate what they receive.
+    """
+
+    def __init__(self, *, size: int) -> None:
+        self.size = size
+
+        self.items: OrderedDict[Hashable, ApiTypes] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, ApiTypes]:
+        """Return whether `key` is cached and its value."""
+        with self.lock:
+            if key not in self.items:
+                return False, None
+            self.items.move_to_end(key)
+            value = self.items[key]
+
+        return True, copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: ApiTypes) -> None:
+        value = copy.deepcopy(value)
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
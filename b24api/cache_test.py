@@ -0,0 +1,29 @@
+from b24api.cache import LRUCache
+
+
+def test_get_copy() -> None:
+    cache = LRUCache(size=2)
+
+    value = {"ID": [1, 2]}
+    cache.put("a", value)
+    value["ID"].append(3)
+
+    hit, cached = cache.get("a")
+    assert hit
+    assert cached == {"ID": [1, 2]}
+
+    cached["ID"].append(4)
+    assert cache.get("a") == (True, {"ID": [1, 2]})
+
+
+def test_evict_least_recent() -> None:
+    cache = LRUCache(size=2)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
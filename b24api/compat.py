@@ -0,0 +1,19 @@
+import sys
+from collections.abc import Generator, Iterable
+from itertools import islice
+from typing import TypeVar
+
+T = TypeVar("T")
+
+if sys.version_info >= (3, 12):
+    from itertools import batched
+else:
+
+    def batched(iterable: Iterable[T], n: int) -> Generator[tuple[T, ...], None, None]:
+        """Backport of `itertools.batched` (Python 3.12+)."""
+        iterator = iter(iterable)
+        while batch := tuple(islice(iterator, n)):
+            yield batch
+
+
+__all__ = ["batched"]
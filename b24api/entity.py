@@ -1,9 +1,10 @@
+from collections.abc import Collection
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, NoReturn
 
 from pydantic import BaseModel, BeforeValidator, field_validator
 
-from b24api.error import ApiResponseError, RetryApiResponseError
+from b24api.error import raise_api_error
 from b24api.query import build_query
 from b24api.type import ApiTypes
 
@@ -19,12 +20,7 @@ class Request(BaseModel):
         if not self.parameters:
             return self.method
 
-        parameters = self.parameters
-        if isinstance(self.parameters, BaseModel):
-            parameters = self.parameters.model_dump()
-        query = build_query(parameters)
-
-        return f"{self.method}?{query}"
+        return f"{self.method}?{build_query(self.parameters)}"
 
 
 class ListRequestParameters(BaseModel):
@@ -41,6 +37,11 @@ class ListRequest(Request):
 
     parameters: ListRequestParameters
 
+    @property
+    def query(self) -> str:
+        # Defaults (empty containers and `None`) produce no query items, skip them before `build_query`
+        return f"{self.method}?{build_query(self.parameters.model_dump(exclude_defaults=True))}"
+
 
 class ErrorResponse(BaseModel):
     """API error response."""
@@ -57,16 +58,8 @@ class ErrorResponse(BaseModel):
             value = value.lower()
         return value
 
-    def raise_error(self, retry_errors: list[str]) -> None:
-        if self.error in retry_errors:
-            raise RetryApiResponseError(
-                code=self.error,
-                description=self.error_description,
-            )
-        raise ApiResponseError(
-            code=self.error,
-            description=self.error_description,
-        )
+    def raise_error(self, retry_errors: Collection[str | int]) -> NoReturn:
+        raise_api_error(self.error, self.error_description, retry_errors)
 
 
 class ResponseTime(BaseModel):
@@ -1,3 +1,6 @@
+from collections.abc import Collection
+from typing import NoReturn
+
 import httpx
 
 
@@ -11,7 +14,7 @@ class ApiResponseError(Exception):
     def __init__(
         self,
         *,
-        code: str,
+        code: str | int,
         description: str | None,
     ) -> None:
         if code and description:
@@ -25,3 +28,14 @@ class ApiResponseError(Exception):
 
 class RetryApiResponseError(ApiResponseError):
     """API error that may be retried."""
+
+
+class CircuitOpenError(Exception):
+    """Call is not sent while server keeps throttling."""
+
+
+def raise_api_error(code: str | int, description: str | None, retry_errors: Collection[str | int]) -> NoReturn:
+    """Raise API error, retryable if `code` is one of `retry_errors`."""
+    if code in retry_errors:
+        raise RetryApiResponseError(code=code, description=description)
+    raise ApiResponseError(code=code, description=description)
@@ -1,36 +1,81 @@
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import quote_plus
 
 from b24api.type import ApiTypes
 
 
-def build_query(parameters: dict[int | str, ApiTypes], path: str = "%s") -> str:
+@lru_cache(maxsize=4096, typed=True)
+def _quote_key(key: int | str) -> str:
+    # Keys (e.g. `select`, `filter`, `>DATE_CREATE`) repeat across requests, encode them once
+    return quote_plus(str(key))
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _quote_subkey(key: int | str) -> str:
+    return f"%5B{quote_plus(str(key))}%5D"
+
+
+# Encoded list index segments `[0]`, `[1]`, ...
+_INDEX_SUBKEYS = tuple(f"%5B{i}%5D" for i in range(64))
+
+
+@lru_cache(maxsize=1024)
+def _quote_datetime(value: datetime) -> str:
+    # Same datetime filter is usually repeated in every request of list
+    return quote_plus(value.astimezone().isoformat())
+
+
+# Formatters of frequent scalar types, booleans as in PHP `http_build_query`
+_FORMATTERS = {
+    str: quote_plus,
+    int: str,
+    bool: lambda value: "1" if value else "0",
+}
+
+
+def _quote_value(value: ApiTypes) -> str:
+    if formatter := _FORMATTERS.get(type(value)):
+        return formatter(value)
+    if isinstance(value, datetime):
+        return _quote_datetime(value)
+    return quote_plus(str(value))
+
+
+def build_query(parameters: dict[int | str, ApiTypes]) -> str:
+    """Build PHP-style query string with nested keys as `key[subkey]`, `None` values are skipped."""
     query = []
 
     if parameters is None:
         return ""
 
-    for key, value in parameters.items():
-        if value is None:
-            continue
+    # Iterators of nested dicts, each with already encoded path prefix
+    stack = [("", iter(parameters.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for key, value in items:
+            if value is None:
+                continue
+            # Empty lists and dicts produce nothing (unlike empty strings and zeros), skip them before encoding key
+            if not value and isinstance(value, list | tuple | dict):
+                continue
 
-        value_ = value
+            if not prefix:
+                key_ = _quote_key(key)
+            elif type(key) is int and 0 <= key < len(_INDEX_SUBKEYS):
+                key_ = prefix + _INDEX_SUBKEYS[key]
+            else:
+                key_ = prefix + _quote_subkey(key)
 
-        if isinstance(value_, list | tuple):
-            value_ = dict(enumerate(value))
+            if isinstance(value, list | tuple):
+                stack.append((key_, iter(enumerate(value))))
+                break
+            if isinstance(value, dict):
+                stack.append((key_, iter(value.items())))
+                break
 
-        if isinstance(value_, dict):
-            subquery = build_query(value_, path % key + "[%s]")
+            query.append(f"{key_}={_quote_value(value)}")
         else:
-            key_ = quote_plus(path % key)
-
-            if isinstance(value_, datetime):
-                value_ = value.astimezone().isoformat()
-            value_ = quote_plus(str(value_))
-
-            subquery = f"{key_}={value_}"
-
-        if subquery:
-            query.append(subquery)
+            stack.pop()
 
     return "&".join(query)
@@ -11,6 +11,11 @@ def test_build_query_empty() -> None:
     assert query == "empty=&zero=0"
 
 
+def test_build_query_bool() -> None:
+    query = build_query({"halt": True, "filter": {"ACTIVE": False}})
+    assert query == "halt=1&filter%5BACTIVE%5D=0"
+
+
 def test_build_query_list() -> None:
     query = build_query({"select": ["ID", "TITLE"]})
     assert query == "select%5B0%5D=ID&select%5B1%5D=TITLE"
@@ -43,3 +48,8 @@ def test_build_query_deep() -> None:
         "&children%5Bsally%5D%5Bsex%5D=F&0=CEO"
     )
     assert query == expected
+
+
+def test_build_query_percent_key() -> None:
+    query = build_query({"filter": {"%TITLE": ["foo", "bar"]}})
+    assert query == "filter%5B%25TITLE%5D%5B0%5D=foo&filter%5B%25TITLE%5D%5B1%5D=bar"
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Adaptive token bucket rate limiter.
+
+    Rate grows additively on success and halves on failure (AIMD, like TCP congestion control),
+    so requests are admitted close to the real server quota instead of being retried after `429`.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float,
+        capacity: int,
+        min_rate: float,
+        max_rate: float,
+        increase: float,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token (possibly in debt) and return time to wait until it is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until request may be sent."""
+        if wait := self._reserve():
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait until request may be sent."""
+        if wait := self._reserve():
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def on_failure(self) -> None:
+        with self.lock:
+            self.rate = max(self.rate / 2, self.min_rate)
@@ -0,0 +1,48 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from b24api.ratelimit import TokenBucket
+
+
+def _bucket() -> TokenBucket:
+    return TokenBucket(rate=2, capacity=3, min_rate=0.5, max_rate=4, increase=1)
+
+
+def test_acquire_burst(mocker: MockerFixture) -> None:
+    mocker.patch("time.monotonic", return_value=100.0)
+    sleep_mock = mocker.patch("time.sleep")
+
+    bucket = _bucket()
+    for _ in range(3):
+        bucket.acquire()
+
+    sleep_mock.assert_not_called()
+
+
+def test_acquire_exhausted(mocker: MockerFixture) -> None:
+    mocker.patch("time.monotonic", return_value=100.0)
+    sleep_mock = mocker.patch("time.sleep")
+
+    bucket = _bucket()
+    for _ in range(5):
+        bucket.acquire()
+
+    assert [c.args[0] for c in sleep_mock.call_args_list] == [pytest.approx(0.5), pytest.approx(1.0)]
+
+
+def test_adapt_rate() -> None:
+    bucket = _bucket()
+
+    initial_rate = bucket.rate
+
+    bucket.on_success()
+    assert bucket.rate == initial_rate + bucket.increase
+    for _ in range(5):
+        bucket.on_success()
+    assert bucket.rate == bucket.max_rate
+
+    bucket.on_failure()
+    assert bucket.rate == bucket.max_rate / 2
+    for _ in range(5):
+        bucket.on_failure()
+    assert bucket.rate == bucket.min_rate
@@ -1,4 +1,6 @@
+import os
 from collections.abc import Generator
+from functools import lru_cache
 from typing import Annotated
 
 from fast_depends import Depends
@@ -12,32 +14,79 @@ class Settings(BaseSettings):
         env_prefix="bitrix24_api_",
         env_file=".env",
         extra="ignore",
+        frozen=True,
     )
 
     webhook_url: HttpUrl
+    preconnect: bool = False
 
-    retry_statuses: list[int] = (
-        codes.LOCKED,
-        codes.TOO_EARLY,
-        codes.TOO_MANY_REQUESTS,
-        codes.INTERNAL_SERVER_ERROR,
-        codes.BAD_GATEWAY,
-        codes.SERVICE_UNAVAILABLE,
-        codes.INSUFFICIENT_STORAGE,
+    # HTTP timeout in seconds
+    timeout: float = 30
+
+    # Connection pool (shared by all threads and synchronous clients): as large as httpx default, so concurrent
+    # HTTP/1.1 calls do not queue. Idle connections are kept longer than httpx default (5 seconds), so TLS and HTTP/2
+    # state survives between list chunks while consumer processes previous one
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60
+
+    retry_statuses: frozenset[int] = frozenset(
+        {
+            codes.LOCKED,
+            codes.TOO_EARLY,
+            codes.TOO_MANY_REQUESTS,
+            codes.INTERNAL_SERVER_ERROR,
+            codes.BAD_GATEWAY,
+            codes.SERVICE_UNAVAILABLE,
+            codes.INSUFFICIENT_STORAGE,
+        },
     )
-    retry_errors: list[str] = ["query_limit_exceeded", "operation_time_limit"]
+    retry_errors: frozenset[str] = frozenset({"query_limit_exceeded", "operation_time_limit"})
 
+    # Decorrelated jitter: each delay is random between `retry_delay` and previous delay times `retry_backoff`
     retry_tries: int = 5
     retry_delay: float = 5
-    retry_backoff: float = 2
+    retry_backoff: float = 3
+    retry_max_delay: float = 300
+
+    # Circuit breaker: consecutive throttled calls to fail fast after (disabled if not set) and seconds to fail for
+    circuit_threshold: int | None = None
+    circuit_cooldown: float = 60
+
+    # Adaptive rate limiter: initial requests per second (disabled if not set), burst size and rate bounds
+    rate_limit: float | None = None
+    rate_limit_burst: int = 50
+    rate_limit_min: float = 0.5
+    rate_limit_max: float = 50
+    rate_limit_increase: float = 1
+
+    # Number of `call` results to keep in memory (disabled if 0), for repeated reference lookups
+    cache_size: int = 0
 
     list_size: int = 50
     batch_size: int = 50
+    # Request first body batch of `list_batched_no_count` before list bounds are known
+    speculative_prefetch: bool = False
+    # Maximum number of batches or `multiplex` streams in flight (asynchronous client)
+    concurrency: int = 8
+
+
+@lru_cache(maxsize=8)
+def _environ_settings(environ: tuple[tuple[str, str], ...]) -> Settings:  # noqa: ARG001
+    # Environment is only a cache key: settings are built once per distinct environment, not on every resolution
+    return Settings()
 
 
 def api_settings(**kwargs: dict) -> Generator[Settings, None, None]:
-    settings = Settings(**kwargs)
-    yield settings
+    # Dependency also receives arguments of injected call (e.g. `self`), only settings fields override environment
+    overrides = {key: value for key, value in kwargs.items() if key in Settings.model_fields}
+    if overrides:
+        yield Settings(**overrides)
+        return
+
+    prefix = Settings.model_config["env_prefix"].upper()
+    environ = tuple(sorted((key, value) for key, value in os.environ.items() if key.upper().startswith(prefix)))
+    yield _environ_settings(environ)
 
 
 ApiSettings = Annotated[Settings, Depends(api_settings)]
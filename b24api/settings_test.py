@@ -0,0 +1,26 @@
+import pytest
+
+from b24api.api import Bitrix24
+from b24api.settings import api_settings
+
+_LIST_SIZE = 10
+
+
+def test_settings_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    first = next(api_settings())
+    assert next(api_settings()) is first
+
+    monkeypatch.setenv("BITRIX24_API_LIST_SIZE", str(_LIST_SIZE))
+    changed = next(api_settings())
+    assert changed is not first
+    assert changed.list_size == _LIST_SIZE
+
+
+def test_settings_kwargs() -> None:
+    settings = next(api_settings(list_size=_LIST_SIZE))
+    assert settings.list_size == _LIST_SIZE
+    assert next(api_settings()).list_size != settings.list_size
+
+
+def test_settings_shared() -> None:
+    assert Bitrix24().settings is Bitrix24().settings
@@ -1,14 +1,55 @@
+import atexit
+import threading
 from collections.abc import Generator
 from typing import Annotated
 
 from fast_depends import Depends
-from httpx import Client
+from httpx import AsyncClient, Client, Limits
 
+from b24api.settings import ApiSettings, Settings
 
-def httpx_client() -> Generator[Client, None, None]:
-    client = Client(http2=True, timeout=30)
+# Every API call posts JSON body
+HEADERS = {"Content-Type": "application/json"}
+
+
+def _limits(settings: Settings) -> Limits:
+    return Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry,
+    )
+
+
+# Synchronous clients are shared between API instances with same timeout and pool settings, so connections outlive them.
+# Asynchronous clients are not: their connections are bound to event loop.
+_clients: dict[tuple[float, int, int, float], Client] = {}
+_clients_lock = threading.Lock()
+
+
+@atexit.register
+def _close_clients() -> None:
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def httpx_client(settings: ApiSettings) -> Generator[Client, None, None]:
+    key = (settings.timeout, settings.max_connections, settings.max_keepalive_connections, settings.keepalive_expiry)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = Client(http2=True, timeout=settings.timeout, headers=HEADERS, limits=_limits(settings))
+        client = _clients[key]
+
+    yield client
+
+
+def httpx_async_client(settings: ApiSettings) -> Generator[AsyncClient, None, None]:
+    # Concurrent requests are multiplexed as HTTP/2 streams, extra connections are used by HTTP/1.1 only
+    client = AsyncClient(http2=True, timeout=settings.timeout, headers=HEADERS, limits=_limits(settings))
 
     yield client
 
 
 HttpxClient = Annotated[Client, Depends(httpx_client)]
+HttpxAsyncClient = Annotated[AsyncClient, Depends(httpx_async_client)]